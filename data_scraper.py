@@ -1,119 +1,427 @@
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree, html
 from urllib.parse import urljoin, urlparse
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import hashlib
+import math
 import os
+import queue
 import re
+import tempfile
+import threading
 
 # Set the base URL and the directory to save the data
 base_url = 'https://uom.edu.pk'
+base_netloc = urlparse(base_url).netloc
 # The output directory will be created inside your Codespace
 output_dir = 'university_data'
 
-# A set to store visited URLs to avoid infinite loops and duplicate scraping
-visited_urls = set()
+# PDF files found during the crawl are downloaded here
+documents_dir = os.path.join(output_dir, 'documents')
 
-# A list to store the URLs of PDF files
-pdf_links = []
+# Links to these file types are never fetched as pages; PDFs are downloaded
+binary_extensions = ('.pdf', '.zip', '.rar', '.7z', '.jpg', '.jpeg', '.png', '.gif',
+                     '.mp3', '.mp4', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx')
 
-# Create the output directory if it doesn't exist
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-    print(f"Created directory: {output_dir}")
+# Number of pages fetched concurrently; the crawl is bound by network latency
+max_workers = 20
+# Number of PDF files downloaded concurrently alongside the crawl
+pdf_workers = 8
+
+# Shared session so every fetch reuses a keep-alive connection to the site;
+# the pool is sized to the number of workers fetching concurrently
+session = requests.Session()
+session.headers.update({'User-Agent': 'uom-crawler/1.0'})
+adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers + pdf_workers)
+session.mount('http://', adapter)
+session.mount('https://', adapter)
+
+class BloomFilter:
+    """
+    Compact set of seen URLs. Lookups never give a false negative, and give
+    a false positive with probability at most error_rate, so about one new
+    URL in 1/error_rate is wrongly taken as seen and skipped. When a filter
+    reaches its capacity another one, twice as large, is chained on.
+    """
+
+    def __init__(self, capacity=10000, error_rate=1e-6):
+        self.filters = []
+        self.count = 0
+        # Filter i gets error_rate / 2**(i+1), so however long the chain
+        # grows its combined false positive rate stays under error_rate
+        self._add_filter(capacity, error_rate / 2)
+
+    def _add_filter(self, capacity, error_rate):
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self.filters.append((bytearray((num_bits + 7) // 8), num_bits, num_hashes))
+        self.capacity, self.error_rate = capacity, error_rate
+        self.remaining = capacity
+
+    def _hashes(self, item):
+        # One independent 64-bit hash per bit to set; deriving them from two
+        # hashes by double hashing measurably raises the false positive rate.
+        # The newest filter has the tightest error rate and needs the most.
+        data = item.encode('utf-8')
+        num_digests = (self.filters[-1][2] + 7) // 8
+        digest = b''.join(hashlib.blake2b(data, salt=i.to_bytes(16, 'little')).digest()
+                          for i in range(num_digests))
+        return memoryview(digest).cast('Q')
+
+    def _contains(self, hashes):
+        for bits, num_bits, num_hashes in self.filters:
+            for i in range(num_hashes):
+                pos = hashes[i] % num_bits
+                if not bits[pos >> 3] & (1 << (pos & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def __contains__(self, item):
+        return self._contains(self._hashes(item))
+
+    def add(self, item):
+        hashes = self._hashes(item)
+        if self._contains(hashes):
+            return
+        if not self.remaining:
+            self._add_filter(self.capacity * 2, self.error_rate / 2)
+            hashes = self._hashes(item)
+        bits, num_bits, num_hashes = self.filters[-1]
+        for i in range(num_hashes):
+            pos = hashes[i] % num_bits
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.remaining -= 1
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+# Visited URLs, to avoid infinite loops and duplicate scraping. Only the
+# crawl loop adds to it; fetch workers just read it to pre-filter links.
+visited_urls = BloomFilter(capacity=10000, error_rate=1e-6)
+
+# A set to store the URLs of PDF files, each downloaded once
+pdf_links = set()
+# Local names of the PDF files being downloaded; URLs differing only in
+# scheme or host map to the same file, which is fetched once
+pdf_filenames = set()
+
+# Downloads PDF files as they are found, so they overlap with the crawl;
+# created by main()
+pdf_pool = None
+pdf_downloads = []
+# Permissions of downloaded PDF files, from the umask; set by main()
+pdf_file_mode = 0o644
+
+# Crawl progress is appended here so an interrupted crawl can resume:
+# "+ url" when a URL is queued, "- url" once it has been crawled, "! url"
+# when it failed to load and "p url" when a PDF download is queued. The log is removed when a crawl finishes,
+# so the next run starts afresh; it is kept if pages failed, so the next
+# run retries them.
+state_path = os.path.join(output_dir, 'crawl_state.log')
+# Runs that try a page before it is given up on
+max_fetch_attempts = 3
+
+# Files already in the output directory, kept in memory so saving a page
+# doesn't stat the file system; filled in by main() and updated as pages
+# are queued for writing
+saved_files = set()
 
 def is_valid(url):
     """
     Check if a URL is valid and belongs to the same domain.
     """
-    parsed = urlparse(url)
-    return parsed.scheme in ['http', 'https'] and parsed.netloc == urlparse(base_url).netloc
+    # urljoin lowercases the scheme, so a prefix check rejects mailto:,
+    # javascript: and friends without parsing
+    if not url.startswith(('http://', 'https://')):
+        return False
+    return urlparse(url).netloc == base_netloc
 
 def get_all_links(url):
     """
-    Fetch a page and get all valid links from it.
+    Fetch a page and, in a single pass over its tree, collect the valid
+    links, the PDF links and the paragraph text. Returns None if the page
+    could not be fetched or parsed and is worth retrying.
     """
     try:
-        response = requests.get(url, timeout=5)
+        response = session.get(url, timeout=5)
         response.raise_for_status() # Raise an error for bad status codes
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = html.fromstring(response.content)
         links = set()
-        for anchor in soup.find_all('a', href=True):
-            href = anchor['href']
+        pdf_urls = []
+        words = []
+        for element in tree.iter('a', 'p'):
+            if element.tag == 'p':
+                # Collapse extra whitespace and newlines
+                words.extend(element.text_content().split())
+                continue
+
+            href = element.get('href')
+            if href is None:
+                continue
             full_url = urljoin(url, href)
             # Remove anchor part of URL
             if '#' in full_url:
                 full_url = full_url.split('#')[0]
 
+            # Skip binary files before spending a request on them
+            lower_url = full_url.lower()
+            if lower_url.endswith(binary_extensions):
+                if lower_url.endswith('.pdf'):
+                    pdf_urls.append(full_url)
+                continue
+
             if is_valid(full_url) and full_url not in visited_urls:
                 links.add(full_url)
-        
-        # Add the current URL to visited set before returning
-        visited_urls.add(url)
-        return list(links), soup
+
+        return list(links), pdf_urls, ' '.join(words)
+    except requests.exceptions.HTTPError as e:
+        print(f"Error fetching {url}: {e}")
+        # Client errors won't go away on a retry
+        if e.response is not None and 400 <= e.response.status_code < 500:
+            return [], [], ''
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {url}: {e}")
-        return [], None
+        return None
+    except etree.ParserError as e:
+        print(f"Error parsing {url}: {e}")
+        return None
+
+def write_files():
+    """
+    Write queued page content to disk so the crawl loop never blocks on I/O.
+    """
+    while True:
+        url, filepath, content = writer_queue.get()
+        try:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(content)
+            print(f"Saved content from {url} to {filepath}")
+        except OSError as e:
+            print(f"Error saving {url}: {e}")
+        finally:
+            writer_queue.task_done()
+
+# Pages waiting to be written by the background writer thread, which
+# main() starts
+writer_queue = queue.Queue()
 
 def save_content(url, content):
     """
-    Save the extracted text content of a page to a file.
+    Queue the extracted text content of a page to be saved to a file.
     """
     path = urlparse(url).path
     filename = path.strip('/').replace('/', '_') or 'index'
-    filepath = os.path.join(output_dir, f"{filename}.txt")
-    
+    filename = f"{filename}.txt"
+    filepath = os.path.join(output_dir, filename)
+
     # Simple check to avoid overwriting files, can be more robust
-    if not os.path.exists(filepath):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"Saved content from {url} to {filepath}")
-    else:
+    if filename in saved_files:
         print(f"File already exists, skipping: {filepath}")
+        return
+    saved_files.add(filename)
+    writer_queue.put((url, filepath, content))
 
-def find_pdfs(soup, url):
+def pdf_filename(url):
     """
-    Find and store links to PDF files.
+    Local file name of a PDF, taken from its URL path and query, so that
+    e.g. download.php?id=1.pdf and download.php?id=2.pdf stay apart.
     """
-    for link in soup.find_all('a', href=True):
-        href = link['href']
-        full_url = urljoin(url, href)
-        if full_url.lower().endswith('.pdf'):
-            if full_url not in pdf_links:
-                pdf_links.append(full_url)
-                print(f"Found PDF link: {full_url}")
+    parsed = urlparse(url)
+    filename = parsed.path.strip('/').replace('/', '_')
+    if parsed.query:
+        filename += '_' + re.sub(r'[^\w.-]', '_', parsed.query)
+    return filename
+
+def download_pdf(url):
+    """
+    Stream a PDF file into the documents directory.
+    """
+    filepath = os.path.join(documents_dir, pdf_filename(url))
+    if os.path.exists(filepath):
+        print(f"PDF already downloaded, skipping: {filepath}")
+        return
+
+    temp_path = None
+    try:
+        with session.get(url, stream=True, timeout=5) as response:
+            response.raise_for_status()
+            # Write to a temporary file of its own so an interrupted download
+            # isn't kept and concurrent downloads never share a file
+            fd, temp_path = tempfile.mkstemp(suffix='.part', dir=documents_dir)
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temp_path, pdf_file_mode)
+        os.replace(temp_path, filepath)
+        print(f"Downloaded PDF from {url} to {filepath}")
+    except (requests.exceptions.RequestException, OSError) as e:
+        print(f"Error downloading {url}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def submit_pdf(url):
+    """
+    Start downloading a PDF file unless it is already queued. Returns True
+    if the URL is new.
+    """
+    if url in pdf_links:
+        return False
+    pdf_links.add(url)
+    filename = pdf_filename(url)
+    if filename not in pdf_filenames:
+        pdf_filenames.add(filename)
+        pdf_downloads.append(pdf_pool.submit(download_pdf, url))
+    return True
+
+def read_crawl_state():
+    """
+    Yield the (mark, url) entries of the crawl log.
+    """
+    with open(state_path, encoding='utf-8') as f:
+        for line in f:
+            yield line[0], line[2:].rstrip('\n')
+
+def load_crawl_state():
+    """
+    Return the URLs that were queued but not crawled before the previous
+    run stopped, and the PDF files it queued for download, and replay the
+    URLs it saw into visited_urls. Returns empty lists, leaving visited_urls
+    untouched, if there is nothing to resume.
+    """
+    if not os.path.exists(state_path):
+        return [], []
+    queued = {}
+    failures = Counter()
+    pdf_urls = {}
+    for mark, url in read_crawl_state():
+        if mark == '+':
+            queued[url] = True
+        elif mark == '-':
+            queued.pop(url, None)
+        elif mark == '!':
+            failures[url] += 1
+        elif mark == 'p':
+            pdf_urls[url] = True
+    for url, count in failures.items():
+        if count >= max_fetch_attempts and url in queued:
+            print(f"Giving up on {url} after {count} failed attempts")
+            del queued[url]
+    if not queued:
+        return [], []
+    for mark, url in read_crawl_state():
+        if mark == '+':
+            visited_urls.add(url)
+    return list(queued), list(pdf_urls)
 
 def crawl(start_url):
     """
     Main crawling function to start the process.
     """
-    queue = [start_url]
-    visited_urls.add(start_url)
-    
-    while queue:
-        current_url = queue.pop(0)
-        print(f"Crawling: {current_url}")
-        
-        links, soup = get_all_links(current_url)
-        if soup:
-            # Extract text from the page
-            page_text = ' '.join([p.text for p in soup.find_all('p')])
-            # Clean up extra whitespace and newlines
-            page_text = re.sub(r'\s+', ' ', page_text).strip()
-            
-            if page_text:
-                save_content(current_url, page_text)
-            
-            # Find PDFs
-            find_pdfs(soup, current_url)
-
-            # Add new links to the queue
-            for link in links:
-                if link not in visited_urls:
-                    visited_urls.add(link)
-                    queue.append(link)
-
-# Start the crawling process
-print("Starting the web scraper...")
-crawl(base_url)
-print("\nScraping complete!")
-print(f"Found {len(visited_urls)} total pages.")
-print(f"Found {len(pdf_links)} PDF links.")
+    queued, resumed_pdfs = load_crawl_state()
+    frontier = deque(queued)
+    # Futures of in-flight page fetches mapped to their URL
+    pending = {}
+    # Pages that failed to load; they stay queued in the log for the next run
+    failed = 0
+
+    # A log with nothing left to resume is from a finished crawl, so start
+    # a new one over it
+    mode = 'a' if frontier else 'w'
+    with open(state_path, mode, encoding='utf-8', buffering=1) as state, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if frontier:
+            print(f"Resuming previous crawl with {len(frontier)} queued pages")
+            # The pages linking these are already crawled, so restart any
+            # download the previous run didn't finish; finished ones are
+            # skipped as already on disk
+            for pdf_url in resumed_pdfs:
+                submit_pdf(pdf_url)
+        else:
+            visited_urls.add(start_url)
+            state.write(f"+ {start_url}\n")
+            frontier.append(start_url)
+
+        while frontier or pending:
+            # Keep up to max_workers fetches in flight
+            while frontier and len(pending) < max_workers:
+                current_url = frontier.popleft()
+                print(f"Crawling: {current_url}")
+                pending[executor.submit(get_all_links, current_url)] = current_url
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                current_url = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    state.write(f"! {current_url}\n")
+                    failed += 1
+                    continue
+                links, pdf_urls, page_text = result
+                if page_text:
+                    save_content(current_url, page_text)
+
+                # Start downloading newly found PDF files
+                for pdf_url in pdf_urls:
+                    if submit_pdf(pdf_url):
+                        print(f"Found PDF link: {pdf_url}")
+                        state.write(f"p {pdf_url}\n")
+
+                # Add new links to the queue
+                for link in links:
+                    if link not in visited_urls:
+                        visited_urls.add(link)
+                        state.write(f"+ {link}\n")
+                        frontier.append(link)
+
+                state.write(f"- {current_url}\n")
+
+    if failed:
+        print(f"{failed} pages failed to load; run again to retry them")
+    else:
+        os.remove(state_path)
+
+def main():
+    """
+    Crawl the university website, saving page text and PDF files.
+    """
+    # Create the output directory if it doesn't exist
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"Created directory: {output_dir}")
+    os.makedirs(documents_dir, exist_ok=True)
+    saved_files.update(os.listdir(output_dir))
+
+    # Start the background workers here rather than at import, so modules
+    # importing this one (like flask_server) don't get idle threads
+    global pdf_pool, pdf_file_mode
+    umask = os.umask(0)
+    os.umask(umask)
+    pdf_file_mode = 0o666 & ~umask
+    threading.Thread(target=write_files, daemon=True).start()
+    pdf_pool = ThreadPoolExecutor(max_workers=pdf_workers)
+
+    # Start the crawling process
+    print("Starting the web scraper...")
+    try:
+        crawl(base_url)
+        # Let the PDF downloads started during the crawl finish
+        pdf_pool.shutdown(wait=True)
+    finally:
+        # Drop downloads that haven't started if the crawl was interrupted;
+        # they are logged, so resuming the crawl restarts them
+        for download in pdf_downloads:
+            download.cancel()
+        # Wait for the writer to flush the remaining pages
+        writer_queue.join()
+    print("\nScraping complete!")
+    print(f"Found {len(visited_urls)} total pages.")
+    print(f"Found {len(pdf_links)} PDF links.")
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,33 @@ Flask Web Server for University of Malakand AI Chatbot
 Provides REST API and web interface for the intelligent chatbot system
 """
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, make_response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import hashlib
 import json
 import logging
 import os
 from pathlib import Path
+import queue
+import re
 import threading
 import time
+from concurrent.futures import Future
 from datetime import datetime
 
+# orjson is optional; it speeds up JSON encoding of API responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Flask-Compress is optional; it gzip/brotli-compresses larger responses
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 # Import your chatbot system
 try:
     from data_scraper import UniversityDataScraper
@@ -23,9 +40,26 @@ except ImportError:
     CHATBOT_AVAILABLE = False
     print("⚠️ Chatbot modules not found. Running in demo mode.")
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider for jsonify() and request.get_json() backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
+# Compress responses over 500 bytes, preferring Brotli where the client accepts it
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+if Compress:
+    Compress(app)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +67,98 @@ logger = logging.getLogger(__name__)
 # Global chatbot instance
 chatbot_instance = None
 
+class BatcherClosedError(RuntimeError):
+    """Raised when a message is sent to a batcher that has been replaced"""
+
+class BatchedChatbot:
+    """Coalesce concurrent chat requests into one chatbot.chat_batch() call"""
+    
+    def __init__(self, chatbot, batch_size=16, linger_ms=10, timeout=30):
+        self.chatbot = chatbot
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000
+        # Longest a request waits for its answer, so a dead worker can't block it forever
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.worker_pid = None
+        self.closed = False
+        self.lock = threading.Lock()
+    
+    def start_worker(self):
+        """Start the worker thread in the current process if it isn't running"""
+        # Threads don't survive fork, so when gunicorn preloads the app each
+        # worker process starts its own thread on first use
+        with self.lock:
+            if self.worker_pid != os.getpid():
+                # A single worker also serializes access to the chatbot's state
+                worker = threading.Thread(target=self._run)
+                worker.daemon = True
+                worker.start()
+                self.worker_pid = os.getpid()
+    
+    def chat(self, message):
+        """Queue a message and block until its batch has been answered"""
+        if self.worker_pid != os.getpid():
+            self.start_worker()
+        future = Future()
+        # Checked under the lock so nothing is queued behind close()'s sentinel
+        with self.lock:
+            if self.closed:
+                raise BatcherClosedError("Chat batcher has been closed")
+            self.requests.put((message, future))
+        return future.result(timeout=self.timeout)
+    
+    def close(self):
+        """Stop the worker once already queued messages are answered"""
+        with self.lock:
+            self.closed = True
+            self.requests.put(None)
+    
+    def _run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                self._fail_pending()
+                return
+            
+            # Wait up to linger for more messages to fill the batch
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.requests.put(None)
+                    break
+                batch.append(item)
+            
+            try:
+                responses = self.chatbot.chat_batch([message for message, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), response in zip(batch, responses):
+                    future.set_result(response)
+    
+    def _fail_pending(self):
+        """Fail any message still queued after the worker stopped"""
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(BatcherClosedError("Chat batcher has been closed"))
+
+# Batches chat requests for chatbot_instance
+chat_batcher = None
+
 # HTML template for the web interface
 WEB_TEMPLATE = """
 <!DOCTYPE html>
@@ -404,9 +530,13 @@ WEB_TEMPLATE = """
 </html>
 """
 
+# The page has no template variables, so encode it once and serve it as-is
+INDEX_HTML = WEB_TEMPLATE.encode('utf-8')
+INDEX_ETAG = hashlib.md5(INDEX_HTML).hexdigest()
+
 def initialize_chatbot():
     """Initialize the chatbot system"""
-    global chatbot_instance
+    global chatbot_instance, chat_batcher
     
     if not CHATBOT_AVAILABLE:
         logger.warning("Chatbot modules not available. Running in demo mode.")
@@ -422,6 +552,7 @@ def initialize_chatbot():
             return False
         
         chatbot_instance = UniversityAIChatbot()
+        chat_batcher = BatchedChatbot(chatbot_instance)
         logger.info("Chatbot initialized successfully!")
         return True
         
@@ -468,15 +599,19 @@ For specific requirements, visit www.uom.edu.pk""",
     'default': "I'm here to help with University of Malakand information. You can ask about faculty, departments, admissions, or general university queries."
 }
 
+# Keyword patterns for the demo responses, matched anywhere in the message
+DEMO_FACULTY_RE = re.compile('faculty|professor|teacher')
+DEMO_ADMISSION_RE = re.compile('admission|apply|requirement')
+
 def get_demo_response(message):
     """Get demo response when chatbot is not available"""
     msg = message.lower()
     
     if 'help' in msg:
         return DEMO_RESPONSES['help']
-    elif any(word in msg for word in ['faculty', 'professor', 'teacher']):
+    elif DEMO_FACULTY_RE.search(msg):
         return DEMO_RESPONSES['faculty']
-    elif any(word in msg for word in ['admission', 'apply', 'requirement']):
+    elif DEMO_ADMISSION_RE.search(msg):
         return DEMO_RESPONSES['admission']
     else:
         return DEMO_RESPONSES['default']
@@ -484,7 +619,10 @@ def get_demo_response(message):
 @app.route('/')
 def index():
     """Main page with chat interface"""
-    return render_template_string(WEB_TEMPLATE)
+    response = make_response(INDEX_HTML)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    response.set_etag(INDEX_ETAG)
+    return response.make_conditional(request)
 
 @app.route('/api/status')
 def status():
@@ -516,8 +654,12 @@ def chat():
         logger.info(f"Chat request: {message}")
         
         # Get response from chatbot or demo
-        if chatbot_instance:
-            response = chatbot_instance.chat(message)
+        if chat_batcher:
+            try:
+                response = chat_batcher.chat(message)
+            except BatcherClosedError:
+                # The chatbot was replaced by a scrape mid-request; ask the new one
+                response = chat_batcher.chat(message)
         else:
             response = get_demo_response(message)
         
@@ -543,8 +685,16 @@ def trigger_scraping():
             scraper.scrape_university_complete(max_pages=200)
             
             # Reinitialize chatbot after scraping
-            global chatbot_instance
+            global chatbot_instance, chat_batcher
             chatbot_instance = UniversityAIChatbot()
+            
+            previous_batcher = chat_batcher
+            chat_batcher = BatchedChatbot(chatbot_instance)
+            if previous_batcher:
+                previous_batcher.close()
+            
+            # The knowledge base changed, so recount it on the next request
+            kb_info_cache['data'] = None
         
         scraping_thread = threading.Thread(target=run_scraper)
         scraping_thread.daemon = True
@@ -559,30 +709,51 @@ def trigger_scraping():
         logger.error(f"Scraping error: {e}")
         return jsonify({'error': 'Failed to start scraping'}), 500
 
+def count_entries(directory, suffix='', recursive=False):
+    """Count directory entries whose name ends with suffix (0 if the directory is missing)"""
+    count = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix):
+                    count += 1
+                if recursive and entry.is_dir(follow_symlinks=False):
+                    count += count_entries(entry.path, suffix, recursive)
+    except FileNotFoundError:
+        return 0
+    return count
+
+# Knowledge base counts are cached for KB_INFO_TTL seconds so that polling
+# the endpoint doesn't rescan the data directory on every request
+KB_INFO_TTL = 30
+kb_info_cache = {'timestamp': 0, 'data': None}
+
 @app.route('/api/knowledge-base-info')
 def knowledge_base_info():
     """Get information about the knowledge base"""
-    data_dir = Path("university_data")
+    data_dir = "university_data"
     
-    if not data_dir.exists():
+    if not os.path.exists(data_dir):
         return jsonify({
             'exists': False,
             'message': 'Knowledge base not found'
         })
     
+    now = time.monotonic()
+    if kb_info_cache['data'] and now - kb_info_cache['timestamp'] < KB_INFO_TTL:
+        return jsonify(kb_info_cache['data'])
+    
     try:
         # Get file counts
-        pages_count = len(list((data_dir / "pages").glob("*.json"))) if (data_dir / "pages").exists() else 0
-        faculty_count = len(list((data_dir / "faculty").glob("*.json"))) if (data_dir / "faculty").exists() else 0
-        docs_count = len(list((data_dir / "documents").rglob("*"))) if (data_dir / "documents").exists() else 0
-        
-        return jsonify({
+        data = {
             'exists': True,
-            'pages_count': pages_count,
-            'faculty_count': faculty_count,
-            'documents_count': docs_count,
-            'database_exists': (data_dir / "university_knowledge.db").exists()
-        })
+            'pages_count': count_entries(os.path.join(data_dir, "pages"), ".json"),
+            'faculty_count': count_entries(os.path.join(data_dir, "faculty"), ".json"),
+            'documents_count': count_entries(os.path.join(data_dir, "documents"), recursive=True),
+            'database_exists': os.path.exists(os.path.join(data_dir, "university_knowledge.db"))
+        }
+        kb_info_cache.update(timestamp=now, data=data)
+        return jsonify(data)
         
     except Exception as e:
         return jsonify({
@@ -590,7 +761,8 @@ def knowledge_base_info():
             'error': str(e)
         })
 
-if __name__ == '__main__':
+def main():
+    """Start the development server"""
     print("🎓 University of Malakand AI Chatbot Server")
     print("=" * 50)
     
@@ -606,10 +778,13 @@ if __name__ == '__main__':
     print(f"📱 Access the chatbot at: http://localhost:5000")
     print(f"🔧 API Status: http://localhost:5000/api/status")
     
-    # Run Flask app
+    # Run Flask's development server; use wsgi.py with gunicorn in production
     app.run(
         host='0.0.0.0',  # Allow external connections (for Codespaces)
         port=5000,
-        debug=True,
+        debug=False,
         threaded=True
     )
+
+if __name__ == '__main__':
+    main()
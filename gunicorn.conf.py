@@ -0,0 +1,14 @@
+"""
+gunicorn settings for the University of Malakand AI Chatbot.
+Picked up automatically when running `gunicorn wsgi:application`
+from the project directory.
+"""
+
+bind = "0.0.0.0:5000"
+workers = 4
+worker_class = "gthread"
+threads = 8
+
+# Load the knowledge base once in the master process; forked workers share
+# its memory pages copy-on-write instead of each loading their own copy
+preload_app = True
@@ -6,80 +6,41 @@ This script sets up everything needed for the intelligent chatbot system
 
 import os
 import sys
+import hashlib
+import io
 import subprocess
+import compileall
 import time
-from pathlib import Path
-
-def print_banner():
-    """Print setup banner"""
-    print("🎓" + "=" * 60 + "🎓")
-    print("    University of Malakand AI Chatbot Setup")
-    print("    Building an Intelligent Information System")
-    print("🎓" + "=" * 60 + "🎓")
-    print()
-
-def check_python_version():
-    """Check if Python version is compatible"""
-    print("🔍 Checking Python version...")
-    if sys.version_info < (3, 7):
-        print("❌ Python 3.7+ is required. Current version:", sys.version)
-        return False
-    print(f"✅ Python {sys.version.split()[0]} detected")
-    return True
-
-def install_requirements():
-    """Install required packages"""
-    print("\n📦 Installing required packages...")
-    
-    requirements = [
-        "requests==2.31.0",
-        "beautifulsoup4==4.12.2",
-        "lxml==4.9.3",
-        "flask==2.3.3",
-        "flask-cors==4.0.0",
-        "werkzeug==2.3.7"
-    ]
-    
-    for package in requirements:
-        try:
-            print(f"Installing {package}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package], 
-                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            print(f"✅ {package} installed")
-        except subprocess.CalledProcessError:
-            print(f"❌ Failed to install {package}")
-            return False
-    
-    print("✅ All packages installed successfully!")
-    return True
-
-def create_project_structure():
-    """Create necessary directories"""
-    print("\n📁 Creating project structure...")
-    
-    directories = [
-        "university_data",
-        "university_data/pages",
-        "university_data/documents",
-        "university_data/faculty",
-        "university_data/departments",
-        "university_data/notifications",
-        "university_data/admissions",
-        "university_data/research",
-        "logs"
-    ]
-    
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
-        print(f"✅ Created directory: {directory}")
-    
-    return True
-
-def create_config_file():
-    """Create configuration file"""
-    print("\n⚙️ Creating configuration...")
-    
-    config = """# University of Malakand AI Chatbot Configuration
+from contextlib import redirect_stderr, redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from importlib import metadata
+except ImportError:  # Python 3.7
+    metadata = None
+
+# Third-party packages needed by the chatbot. These files are also where
+# pyproject.toml takes its dependencies and the fast and production extras
+# from, so they are the one place to change a version.
+REQUIREMENTS_FILES = ["requirements.txt", "requirements-fast.txt",
+                      "requirements-production.txt"]
+
+def read_requirements():
+    """Read the requirement specifiers from REQUIREMENTS_FILES"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    requirements = []
+    for name in REQUIREMENTS_FILES:
+        with open(os.path.join(here, name)) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    requirements.append(line)
+    return requirements
+
+REQUIREMENTS = read_requirements()
+
+# Contents of the generated config.py
+CONFIG_TEMPLATE = """# University of Malakand AI Chatbot Configuration
 
 # University Settings
 UNIVERSITY_NAME = "University of Malakand"
@@ -102,22 +63,15 @@ DEBUG = True
 ENABLE_SCRAPING_API = True
 ENABLE_ADMIN_API = True
 """
-    
-    with open("config.py", "w") as f:
-        f.write(config)
-    
-    print("✅ Configuration file created")
-    return True
 
-def create_startup_scripts():
-    """Create convenient startup scripts"""
-    print("\n🚀 Creating startup scripts...")
-    
-    # Create start_scraping.py
-    scraping_script = """#!/usr/bin/env python3
+# Generated convenience scripts, keyed by file name
+STARTUP_SCRIPTS = {
+    "start_scraping.py": """#!/usr/bin/env python3
 '''Convenient script to start data scraping'''
 
 if __name__ == "__main__":
+    # Report progress before the (slow) import of the scraper and its dependencies
+    print("🕷️ Loading data scraper...")
     try:
         from data_scraper import main
         main()
@@ -127,16 +81,14 @@ if __name__ == "__main__":
         print("\\n⏹️ Scraping stopped by user")
     except Exception as e:
         print(f"❌ Error: {e}")
-"""
-    
-    with open("start_scraping.py", "w") as f:
-        f.write(scraping_script)
+""",
     
-    # Create start_chatbot.py
-    chatbot_script = """#!/usr/bin/env python3
+    "start_chatbot.py": """#!/usr/bin/env python3
 '''Convenient script to start the chatbot'''
 
 if __name__ == "__main__":
+    # Report progress before the (slow) import of the chatbot and its dependencies
+    print("🤖 Loading chatbot...")
     try:
         from uom_ai_chatbot import main
         main()
@@ -146,21 +98,18 @@ if __name__ == "__main__":
         print("\\n⏹️ Chatbot stopped by user")
     except Exception as e:
         print(f"❌ Error: {e}")
-"""
-    
-    with open("start_chatbot.py", "w") as f:
-        f.write(chatbot_script)
+""",
     
-    # Create start_server.py
-    server_script = """#!/usr/bin/env python3
+    "start_server.py": """#!/usr/bin/env python3
 '''Convenient script to start the web server'''
 
 if __name__ == "__main__":
+    # Print the banner before Flask, Werkzeug and Jinja2 are imported
+    print("🌐 Starting University of Malakand AI Chatbot Server...")
+    print("📱 Access the chatbot at: http://localhost:5000")
     try:
         from flask_server import app
-        print("🌐 Starting University of Malakand AI Chatbot Server...")
-        print("📱 Access the chatbot at: http://localhost:5000")
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        app.run(host='0.0.0.0', port=5000, debug=False)
     except ImportError:
         print("❌ Flask server not found. Please ensure all files are in place.")
     except KeyboardInterrupt:
@@ -168,22 +117,10 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"❌ Error: {e}")
 """
-    
-    with open("start_server.py", "w") as f:
-        f.write(server_script)
-    
-    # Make scripts executable
-    for script in ["start_scraping.py", "start_chatbot.py", "start_server.py"]:
-        os.chmod(script, 0o755)
-        print(f"✅ Created {script}")
-    
-    return True
+}
 
-def create_readme():
-    """Create comprehensive README file"""
-    print("\n📝 Creating README...")
-    
-    readme_content = """# 🎓 University of Malakand AI Chatbot
+# Contents of the generated README.md
+README_TEMPLATE = """# 🎓 University of Malakand AI Chatbot
 
 An intelligent, comprehensive AI system designed to provide accurate information about the University of Malakand. This system scrapes, processes, and serves university data through an advanced chatbot interface with zero-failure information retrieval.
 
@@ -214,8 +151,8 @@ python setup.py
 
 ### Option 2: Manual Setup
 ```bash
-# Install dependencies
-pip install -r requirements.txt
+# Install dependencies (the last two files are optional speedups and gunicorn)
+pip install -r requirements.txt -r requirements-fast.txt -r requirements-production.txt
 
 # Create directories
 mkdir -p university_data/{pages,documents,faculty,departments,notifications}
@@ -269,9 +206,11 @@ university_chatbot/
 ├── data_scraper.py          # Main scraping engine
 ├── uom_ai_chatbot.py       # AI chatbot system
 ├── flask_server.py         # Web server
+├── wsgi.py                 # WSGI entry point for gunicorn
+├── gunicorn.conf.py        # gunicorn settings
 ├── setup.py               # Setup script
 ├── config.py              # Configuration
-├── requirements.txt       # Dependencies
+├── requirements*.txt      # Dependencies (core, fast, production)
 ├── start_*.py            # Convenience scripts
 ├── university_data/      # Scraped data
 │   ├── pages/           # Web pages
@@ -284,7 +223,7 @@ university_chatbot/
 
 ## 🌟 Key Technologies
 
-- **Web Scraping**: BeautifulSoup, Requests
+- **Web Scraping**: lxml, Requests
 - **Data Storage**: SQLite, JSON
 - **AI Processing**: Custom NLP, TF-IDF
 - **Web Interface**: Flask, HTML/CSS/JavaScript
@@ -313,6 +252,15 @@ python setup.py
 python start_server.py
 ```
 
+### Production
+`start_server.py` runs Flask's single-process development server. For real
+traffic, serve `wsgi.py` with gunicorn to use every CPU core:
+```bash
+gunicorn wsgi:application
+```
+`gunicorn.conf.py` runs 4 workers with 8 threads each and preloads the app,
+so the knowledge base is loaded once and shared by all workers.
+
 ## 🔄 Updating Data
 
 The system can update its knowledge base:
@@ -349,46 +297,203 @@ For issues or questions, please create an issue in the repository.
 ---
 **Made with ❤️ for University of Malakand**
 """
+
+# Running interpreter's version, e.g. "3.11.4"
+_PYVER = "%d.%d.%d" % sys.version_info[:3]
+
+# Written after a successful run; holds a hash of everything setup installs
+# and generates, so an unchanged setup can be skipped
+SETUP_MARKER = ".setup_done"
+
+def setup_fingerprint():
+    """Hash the requirements and the templates of the generated files"""
+    digest = hashlib.sha256()
+    parts = REQUIREMENTS + [CONFIG_TEMPLATE, README_TEMPLATE]
+    for name, content in sorted(STARTUP_SCRIPTS.items()):
+        parts += [name, content]
+    for part in parts:
+        digest.update(part.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+def is_set_up(fingerprint):
+    """Check whether a previous run completed with the same fingerprint"""
+    try:
+        with open(SETUP_MARKER) as f:
+            return f.read().strip() == fingerprint
+    except OSError:
+        return False
+
+def print_banner():
+    """Print setup banner"""
+    print("🎓" + "=" * 60 + "🎓")
+    print("    University of Malakand AI Chatbot Setup")
+    print("    Building an Intelligent Information System")
+    print("🎓" + "=" * 60 + "🎓")
+    print()
+
+def check_python_version():
+    """Check if Python version is compatible"""
+    print("🔍 Checking Python version...")
+    if sys.version_info < (3, 7):
+        print("❌ Python 3.7+ is required. Current version:", _PYVER)
+        return False
+    print(f"✅ Python {_PYVER} detected")
+    return True
+
+def missing_requirements():
+    """Return the requirements that aren't installed at their pinned version"""
+    if metadata is None:
+        return list(REQUIREMENTS)
+    
+    needed = []
+    for requirement in REQUIREMENTS:
+        # Unpinned requirements (e.g. numpy>=1.21) are met by any installed version
+        name, pinned, version = requirement.partition("==")
+        name = name.split(">=", 1)[0]
+        try:
+            installed = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            installed = None
+        if installed is None or (pinned and installed != version):
+            needed.append(requirement)
+    return needed
+
+def run_pip(args, show_errors=True):
+    """Run pip with args, in this interpreter when possible; True on success"""
+    # Running pip in-process saves starting another interpreter. Its CLI
+    # module isn't a public API, so fall back to a subprocess if it moves.
+    try:
+        from pip._internal.cli.main import main as pip_main
+    except ImportError:
+        pip_main = None
+    
+    # Of pip's output only the summary and, if wanted, errors are shown
+    prefixes = ("Successfully installed",)
+    if show_errors:
+        prefixes += ("ERROR",)
+    
+    if pip_main is not None:
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output), redirect_stderr(output):
+                status = pip_main(args)
+        except SystemExit as e:
+            status = 0 if e.code is None else e.code
+        for line in output.getvalue().splitlines():
+            if line.startswith(prefixes):
+                print(line)
+        return status == 0
+    
+    # Forward matching lines as pip prints them
+    process = subprocess.Popen([sys.executable, "-m", "pip"] + args,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, bufsize=1)
+    with process.stdout:
+        for line in process.stdout:
+            if line.startswith(prefixes):
+                print(line, end="", flush=True)
+    return process.wait() == 0
+
+def install_requirements():
+    """Install required packages"""
+    print("\n📦 Installing required packages...")
+    
+    # Skip pip entirely when every pinned version is already installed
+    needed = missing_requirements()
+    if not needed:
+        print("✅ All packages already installed")
+        return True
     
-    with open("README.md", "w") as f:
-        f.write(readme_content)
+    # One pip run resolves and downloads the whole set together, reusing
+    # cached wheels from earlier runs
+    pip_args = ["install", "--progress-bar", "off",
+                "--disable-pip-version-check", "--no-input", "--prefer-binary",
+                "--cache-dir", os.path.expanduser("~/.cache/pip")]
+    print(f"Installing {', '.join(needed)}...")
+    # Show what's happening before the long-running install starts
+    sys.stdout.flush()
     
-    print("✅ README.md created")
+    # Try wheels only first so nothing (e.g. lxml) is compiled from source,
+    # then allow source builds for platforms without a matching wheel.
+    # Only the final attempt's errors are shown.
+    for binary_option in (["--only-binary=:all:"], []):
+        if run_pip(pip_args + binary_option + needed, show_errors=not binary_option):
+            break
+    else:
+        print("❌ Failed to install required packages")
+        return False
+    
+    print("✅ All packages installed successfully!")
     return True
 
-def create_requirements_file():
-    """Create requirements.txt file"""
-    requirements = """requests==2.31.0
-beautifulsoup4==4.12.2
-lxml==4.9.3
-flask==2.3.3
-flask-cors==4.0.0
-werkzeug==2.3.7
-pathlib
-sqlite3
-concurrent.futures
-dataclasses
-hashlib
-urllib3==2.0.7
-"""
+def create_project_structure():
+    """Create necessary directories"""
+    print("\n📁 Creating project structure...")
+    
+    # Top-level directories are created first, so their subdirectories
+    # only need a single mkdir each
+    parents = ["university_data", "logs"]
+    leaves = ["pages", "documents", "faculty", "departments",
+              "notifications", "admissions", "research"]
+    
+    for directory in parents:
+        os.makedirs(directory, exist_ok=True)
+        print(f"✅ Created directory: {directory}")
     
-    with open("requirements.txt", "w") as f:
-        f.write(requirements)
+    def make_directory(leaf):
+        directory = f"university_data/{leaf}"
+        os.makedirs(directory, exist_ok=True)
+        return directory
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for directory in executor.map(make_directory, leaves):
+            print(f"✅ Created directory: {directory}")
     
-    print("✅ requirements.txt created")
     return True
 
-def run_system_check():
-    """Run comprehensive system check"""
-    print("\n🔍 Running system check...")
+def _dump(path, text, mode=0o644):
+    """Write text to path as UTF-8 straight through the file descriptor"""
+    data = text.encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        # os.write may write less than asked, so loop until all of it is out
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+def write_file(spec):
+    """Write one generated file; spec is a (path, content, mode) tuple"""
+    path, content, mode = spec
+    _dump(path, content)
+    if mode is not None:
+        os.chmod(path, mode)
+    return path
+
+def create_project_files():
+    """Create configuration, startup scripts and documentation"""
+    print("\n📝 Writing project files...")
+    
+    files = [("config.py", CONFIG_TEMPLATE, None)]
+    files += [(name, script, 0o755) for name, script in STARTUP_SCRIPTS.items()]
+    files += [("README.md", README_TEMPLATE, None)]
     
-    checks = {
-        "Python version": check_python_version(),
-        "Project structure": True,
-        "Configuration": True,
-        "Dependencies": True
-    }
+    # File writes are I/O bound, so they overlap well in threads
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for path in executor.map(write_file, files):
+            print(f"✅ Created {path}")
     
+    return True
+
+def precompile_modules():
+    """Byte-compile the project modules so their first import skips compilation"""
+    print("\n⚙️ Precompiling project modules...")
+    # workers=0 compiles on every CPU; only the top-level modules are needed
+    compileall.compile_dir(".", maxlevels=0, quiet=1, workers=0)
+    return True
+
+def run_system_check(checks):
+    """Report the results gathered while running the setup steps"""
     print("\n📊 System Check Results:")
     for check, status in checks.items():
         status_icon = "✅" if status else "❌"
@@ -398,28 +503,41 @@ def run_system_check():
 
 def main():
     """Main setup function"""
+    # Buffer output on terminals too and flush once per step, so slow
+    # remote terminals don't round-trip on every printed line
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
     print_banner()
     
+    fingerprint = setup_fingerprint()
+    if "--force" not in sys.argv[1:] and is_set_up(fingerprint):
+        print("✅ Already set up (use --force to redo)")
+        return True
+    
     try:
-        # Run setup steps
+        # Run setup steps, recording each result for the final system check
         steps = [
-            ("Checking Python version", check_python_version),
-            ("Installing requirements", install_requirements),
-            ("Creating project structure", create_project_structure),
-            ("Creating configuration", create_config_file),
-            ("Creating requirements file", create_requirements_file),
-            ("Creating startup scripts", create_startup_scripts),
-            ("Creating documentation", create_readme),
+            ("Checking Python version", "Python version", check_python_version),
+            ("Installing requirements", "Dependencies", install_requirements),
+            ("Creating project structure", "Project structure", create_project_structure),
+            ("Creating project files", "Configuration", create_project_files),
         ]
+        results = {}
         
-        for step_name, step_func in steps:
+        for step_name, check_name, step_func in steps:
             print(f"\n🔧 {step_name}...")
-            if not step_func():
+            results[check_name] = step_func()
+            sys.stdout.flush()
+            if not results[check_name]:
                 print(f"❌ {step_name} failed!")
                 return False
         
+        precompile_modules()
+        sys.stdout.flush()
+        
         # Final system check
-        if run_system_check():
+        if run_system_check(results):
+            _dump(SETUP_MARKER, fingerprint + "\n")
             print("\n🎉 Setup completed successfully!")
             print("\n📋 Next Steps:")
             print("1. Run 'python start_scraping.py' to collect university data")
@@ -6,22 +6,49 @@ about the university using scraped data and advanced NLP techniques.
 """
 
 import sqlite3
+import atexit
 import json
 import os
 import re
+import sys
 import logging
+import threading
+import weakref
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime
 import requests
 from dataclasses import dataclass
 import hashlib
+import heapq
 import pickle
 
 # For text processing and similarity
-from collections import Counter
+from collections import Counter, OrderedDict, deque
+from itertools import chain
 import math
 
+# numpy is optional; with it pages are scored with array operations
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Tokens are runs of at least three word characters; \w is Unicode-aware,
+# so Urdu words are kept too
+_TOKEN_RE = re.compile(r'\w{3,}')
+
+# Identifies the code answering queries; responses saved by other code
+# (e.g. an older release with different formatting) are not reused
+try:
+    with open(__file__, 'rb') as _source:
+        _CODE_VERSION = hashlib.md5(_source.read()).hexdigest()
+except OSError:
+    _CODE_VERSION = None
+
+# Words too common to help find a page
+_STOPWORDS = frozenset(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'])
+
 @dataclass
 class SearchResult:
     """Structure for search results"""
@@ -38,23 +65,46 @@ class UniversityKnowledgeBase:
     def __init__(self, data_dir: str = "university_data"):
         self.data_dir = Path(data_dir)
         self.db_path = self.data_dir / "university_knowledge.db"
+        # Token counts of page contents, keyed by content hash
+        self.token_cache_path = self.data_dir / "token_cache.pkl"
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
+        # Initialize text processing (needed to tokenize pages while loading)
+        self.stopwords = _STOPWORDS
+        
         # Load knowledge base
         self.load_knowledge_base()
         
-        # Initialize text processing
-        self.stopwords = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'])
-        
-        # Cache for faster searches
-        self.search_cache = {}
+        # LRU cache of search results, keyed on the sorted query tokens
+        self.search_cache = OrderedDict()
+        self.search_cache_size = 512
         
         # Faculty and department quick access
         self.faculty_index = {}
         self.department_index = {}
+        # Word -> (position in index order, entry) of the names containing it
+        self.faculty_token_index = {}
+        self.department_token_index = {}
+        
+        # Indices of the pages of each content type
+        self.pages_by_category = {}
+        
+        # Inverted index: token -> indices of the pages containing it
+        self.postings = {}
+        self.df = Counter()
+        self.idf = {}
+        
+        # TF-IDF weights as flat arrays (a sparse vocabulary x content matrix
+        # in CSC layout), when numpy is available: the weights of word
+        # vocabulary[w] for the content rows row_ids[word_ptr[w]:word_ptr[w + 1]]
+        self.vocabulary = {}
+        self.word_ptr = None
+        self.row_ids = None
+        self.row_weights = None
+        self.category_page_ids = {}
         self.build_indexes()
 
     def load_knowledge_base(self):
@@ -64,46 +114,104 @@ class UniversityKnowledgeBase:
         
         self.logger.info("Loading university knowledge base...")
         
-        # Load from database
-        conn = sqlite3.connect(self.db_path)
+        # Load from database, read-only: the knowledge base never writes to it
+        conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.row_factory = sqlite3.Row
         
         # Load all pages
-        self.pages = []
-        cursor = conn.execute("SELECT url, title, content, content_type FROM pages")
-        for row in cursor.fetchall():
-            self.pages.append({
-                'url': row[0],
-                'title': row[1],
-                'content': row[2],
-                'content_type': row[3]
-            })
+        self.pages = [dict(row) for row in conn.execute("SELECT url, title, content, content_type FROM pages")]
         
         # Load faculty information
-        self.faculty = []
-        cursor = conn.execute("SELECT * FROM faculty")
-        columns = [description[0] for description in cursor.description]
-        for row in cursor.fetchall():
-            self.faculty.append(dict(zip(columns, row)))
+        self.faculty = [dict(row) for row in conn.execute("SELECT * FROM faculty")]
         
         # Load departments
-        self.departments = []
-        cursor = conn.execute("SELECT * FROM departments")
-        columns = [description[0] for description in cursor.description]
-        for row in cursor.fetchall():
-            self.departments.append(dict(zip(columns, row)))
-        
-        # Load notifications
-        self.notifications = []
-        cursor = conn.execute("SELECT * FROM notifications")
-        columns = [description[0] for description in cursor.description]
-        for row in cursor.fetchall():
-            self.notifications.append(dict(zip(columns, row)))
+        self.departments = [dict(row) for row in conn.execute("SELECT * FROM departments")]
+        
+        # Load notifications, newest first
+        self.notifications = [dict(row) for row in conn.execute("SELECT * FROM notifications")]
+        self.notifications.sort(key=lambda x: x.get('date') or '', reverse=True)
         
         conn.close()
+        
+        self.tokenize_pages()
         self.logger.info(f"Loaded {len(self.pages)} pages, {len(self.faculty)} faculty, {len(self.departments)} departments")
 
+    def tokenize_pages(self):
+        """Precompute the token counts, length and sentence tokens of every page"""
+        # Reuse tokens from earlier runs for pages whose content is unchanged,
+        # as long as they were made by the same tokenizer
+        tokenizer = (_TOKEN_RE.pattern, tuple(sorted(self.stopwords)))
+        try:
+            with open(self.token_cache_path, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            # ValueError for a newer pickle protocol, the others for pickles
+            # of classes that no longer exist
+            saved = None
+        if isinstance(saved, dict) and saved.get('tokenizer') == tokenizer \
+                and isinstance(saved.get('entries'), dict):
+            cache = saved['entries']
+        else:
+            cache = {}
+        
+        used = {}
+        # Pages with identical content (repeated menus and notices) share
+        # their tokens and are scored once per query
+        shared = {}
+        self.content_ids = []
+        self.content_pages = []
+        for page_id, page in enumerate(self.pages):
+            key = hashlib.md5(page['content'].encode('utf-8')).hexdigest()
+            if key not in shared:
+                sentences = [sentence.strip() for sentence in page['content'].split('.')]
+                entry = cache.get(key)
+                if not isinstance(entry, tuple):
+                    # Tokens never contain a period, so the page's tokens are
+                    # exactly its sentences' tokens; tokenize the text once
+                    sentence_words = [self.preprocess_text(sentence) for sentence in sentences]
+                    entry = (Counter(chain.from_iterable(sentence_words)),
+                             [frozenset(words) for words in sentence_words])
+                used[key] = entry
+                tf, sentence_tokens = entry
+                shared[key] = (len(self.content_pages), tf, sum(tf.values()),
+                               list(zip(sentences, sentence_tokens)))
+                self.content_pages.append(page_id)
+            
+            content_id, page['tf'], page['len'], page['sentences'] = shared[key]
+            self.content_ids.append(content_id)
+        
+        if used.keys() != cache.keys():
+            # Write to a temporary name first so a concurrent reader never sees half a file
+            temp_path = self.token_cache_path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                with open(temp_path, 'wb') as f:
+                    pickle.dump({'tokenizer': tokenizer, 'entries': used}, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.token_cache_path)
+            except OSError as e:
+                self.logger.warning(f"Could not save token cache: {e}")
+
     def build_indexes(self):
         """Build search indexes for faster retrieval"""
+        # Bucket pages by category
+        for page_id, page in enumerate(self.pages):
+            self.pages_by_category.setdefault(page['content_type'], []).append(page_id)
+        
+        # Build the inverted index and document frequencies
+        for page_id, page in enumerate(self.pages):
+            for word in page['tf']:
+                self.postings.setdefault(word, set()).add(page_id)
+        self.df.update({word: len(ids) for word, ids in self.postings.items()})
+        
+        # Smoothed IDF, so a word found on every page still counts a little
+        num_pages = len(self.pages)
+        self.idf = {word: math.log((1 + num_pages) / (1 + df)) + 1 for word, df in self.df.items()}
+        
+        if np is not None:
+            self.build_tfidf_arrays()
+        
         # Build faculty index
         for faculty_member in self.faculty:
             name = faculty_member.get('name', '').lower()
@@ -115,85 +223,206 @@ class UniversityKnowledgeBase:
             name = dept.get('name', '').lower()
             if name:
                 self.department_index[name] = dept
-
-    def preprocess_text(self, text: str) -> List[str]:
-        """Clean and tokenize text for processing"""
-        # Convert to lowercase and remove special characters
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
         
-        # Tokenize and remove stopwords
-        words = [word for word in text.split() if word and word not in self.stopwords and len(word) > 2]
+        self.faculty_token_index = self.build_name_token_index(self.faculty_index)
+        self.department_token_index = self.build_name_token_index(self.department_index)
+
+    @staticmethod
+    def build_name_token_index(index: Dict[str, Dict]) -> Dict[str, List[Tuple[int, Dict]]]:
+        """Map each word of the names in index to the entries with those names"""
+        token_index = {}
+        for position, (name, info) in enumerate(index.items()):
+            for token in set(name.split()):
+                token_index.setdefault(token, []).append((position, info))
+        return token_index
+
+    @staticmethod
+    def find_partial_match(query: str, index: Dict[str, Dict],
+                           token_index: Dict[str, List[Tuple[int, Dict]]]) -> Optional[Dict]:
+        """Find the entry whose name shares the most words with query"""
+        overlap = Counter()
+        entries = {}
+        for token in set(query.split()):
+            for position, info in token_index.get(token, ()):
+                overlap[position] += 1
+                entries[position] = info
+        if overlap:
+            # Most shared words first, then the earliest name
+            return entries[min(overlap, key=lambda p: (-overlap[p], p))]
+        
+        # Fall back to substring matching, e.g. for a partly typed name
+        for name, info in index.items():
+            if query in name or any(part in name for part in query.split()):
+                return info
         
-        return words
+        return None
 
-    def calculate_tf_idf(self, query_words: List[str], document: str) -> float:
+    def build_tfidf_arrays(self):
+        """Build the flat TF-IDF arrays used to score pages with numpy"""
+        self.vocabulary = {word: column for column, word in enumerate(self.postings)}
+        word_ptr = [0]
+        row_ids, row_weights = [], []
+        for word, page_ids in self.postings.items():
+            # One row per distinct page content
+            content_ids = sorted({self.content_ids[page_id] for page_id in page_ids})
+            for content_id in content_ids:
+                page = self.pages[self.content_pages[content_id]]
+                row_ids.append(content_id)
+                row_weights.append(page['tf'][word] / page['len'] * self.idf[word])
+            word_ptr.append(len(row_ids))
+        
+        self.word_ptr = np.array(word_ptr, dtype=np.intp)
+        self.row_ids = np.array(row_ids, dtype=np.intp)
+        self.row_weights = np.array(row_weights, dtype=np.float64)
+        # Maps each page to the row of its content
+        self.content_rows = np.array(self.content_ids, dtype=np.intp)
+        self.category_page_ids = {category: np.array(page_ids, dtype=np.intp)
+                                  for category, page_ids in self.pages_by_category.items()}
+
+    def preprocess_text(self, text: str) -> List[str]:
+        """Tokenize lowercased text and remove stopwords"""
+        # Interned, so every page's counts share one string per word and
+        # dict lookups mostly succeed on identity
+        return [sys.intern(word) for word in _TOKEN_RE.findall(text.lower())
+                if word not in self.stopwords]
+
+    def calculate_tf_idf(self, query_words: List[str], tf_counter: Counter, doc_len: int) -> float:
         """Calculate TF-IDF score for document relevance"""
-        doc_words = self.preprocess_text(document)
-        doc_word_count = len(doc_words)
-        
-        if doc_word_count == 0:
+        if doc_len == 0:
             return 0.0
         
-        # Calculate TF (Term Frequency)
-        doc_word_freq = Counter(doc_words)
-        tf_score = 0
-        
-        for word in query_words:
-            tf = doc_word_freq.get(word, 0) / doc_word_count
-            if tf > 0:
-                tf_score += tf
+        # TF (Term Frequency) of each query word weighted by its IDF
+        tf_idf_score = sum(tf_counter.get(word, 0) / doc_len * self.idf.get(word, 0)
+                           for word in query_words)
         
-        # Simple relevance score (can be enhanced with proper IDF)
-        relevance = tf_score * len([w for w in query_words if w in doc_words]) / len(query_words)
+        # Favour pages that contain more of the query words
+        overlap = sum(1 for word in query_words if word in tf_counter)
+        relevance = tf_idf_score * overlap / len(query_words)
         
         return relevance
 
-    def semantic_search(self, query: str, limit: int = 5) -> List[SearchResult]:
-        """Perform semantic search across university knowledge base"""
+    def semantic_search(self, query: str, limit: int = 5,
+                        categories: Optional[Set[str]] = None) -> List[SearchResult]:
+        """Perform semantic search across university knowledge base, or only
+        the pages of the given categories"""
         query_words = self.preprocess_text(query)
-        results = []
+        if not query_words:
+            return []
+        
+        # Scores don't depend on word order, so reordered queries share an entry
+        cache_key = (" ".join(sorted(query_words)), limit,
+                     tuple(sorted(categories)) if categories is not None else None)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            self.search_cache.move_to_end(cache_key)
+            return list(cached)
+        
+        if self.word_ptr is not None:
+            ranked = self.rank_pages_vectorized(query_words, limit, categories)
+        else:
+            ranked = self.rank_pages(query_words, limit, categories)
         
-        # Search through all pages
-        for page in self.pages:
-            relevance = self.calculate_tf_idf(query_words, page['content'])
+        query_set = set(query_words)
+        results = []
+        for page_id, relevance in ranked:
+            page = self.pages[page_id]
+            # Create snippet
+            snippet = self.create_snippet(page, query_set)
             
+            result = SearchResult(
+                content=page['content'],
+                title=page['title'],
+                url=page['url'],
+                category=page['content_type'],
+                relevance_score=relevance,
+                snippet=snippet
+            )
+            results.append(result)
+        
+        self.search_cache[cache_key] = results
+        if len(self.search_cache) > self.search_cache_size:
+            self.search_cache.popitem(last=False)
+        
+        return list(results)
+
+    def rank_pages(self, query_words: List[str], limit: int,
+                   categories: Optional[Set[str]] = None) -> List[Tuple[int, float]]:
+        """Return the (page index, relevance) pairs of the best matching pages"""
+        scored = []
+        
+        # Only pages containing a query word can score above zero; visit
+        # them in page order so ties rank as before
+        candidates = set().union(*(self.postings.get(word, ()) for word in query_words))
+        if categories is not None:
+            candidates = {page_id for page_id in candidates
+                          if self.pages[page_id]['content_type'] in categories}
+        content_scores = {}
+        for page_id in sorted(candidates):
+            content_id = self.content_ids[page_id]
+            relevance = content_scores.get(content_id)
+            if relevance is None:
+                page = self.pages[page_id]
+                relevance = self.calculate_tf_idf(query_words, page['tf'], page['len'])
+                content_scores[content_id] = relevance
             if relevance > 0:
-                # Create snippet
-                snippet = self.create_snippet(page['content'], query_words)
-                
-                result = SearchResult(
-                    content=page['content'],
-                    title=page['title'],
-                    url=page['url'],
-                    category=page['content_type'],
-                    relevance_score=relevance,
-                    snippet=snippet
-                )
-                results.append(result)
-        
-        # Sort by relevance
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        
-        return results[:limit]
-
-    def create_snippet(self, content: str, query_words: List[str], snippet_length: int = 200) -> str:
-        """Create a relevant snippet from content"""
-        sentences = content.split('.')
+                scored.append((page_id, relevance))
+        
+        # Best `limit` by relevance; like a stable sort, ties stay in page order
+        return heapq.nlargest(limit, scored, key=lambda x: x[1])
+
+    def rank_pages_vectorized(self, query_words: List[str], limit: int,
+                              categories: Optional[Set[str]] = None) -> List[Tuple[int, float]]:
+        """Same as rank_pages, scoring pages with numpy over the query words' postings"""
+        num_contents = len(self.content_pages)
+        content_scores = np.zeros(num_contents)
+        overlap = np.zeros(num_contents)
+        # Words are added in query order, exactly as in calculate_tf_idf
+        for word in query_words:
+            column = self.vocabulary.get(word)
+            if column is None:
+                continue
+            start, end = self.word_ptr[column], self.word_ptr[column + 1]
+            rows = self.row_ids[start:end]
+            content_scores[rows] += self.row_weights[start:end]
+            overlap[rows] += 1
+        
+        scores = (content_scores * overlap / len(query_words))[self.content_rows]
+        
+        if categories is None:
+            matches = np.flatnonzero(scores > 0)
+        else:
+            allowed = [self.category_page_ids[category] for category in categories
+                       if category in self.category_page_ids]
+            allowed = np.concatenate(allowed) if allowed else np.empty(0, dtype=np.intp)
+            matches = allowed[scores[allowed] > 0]
+        if len(matches) > limit > 0:
+            # Keep the top `limit` scores plus anything tied with the last one
+            cutoff = -np.partition(-scores[matches], limit - 1)[limit - 1]
+            matches = matches[scores[matches] >= cutoff]
+        # Highest score first, ties in page order
+        order = matches[np.lexsort((matches, -scores[matches]))][:limit]
+        
+        return [(int(page_id), float(scores[page_id])) for page_id in order]
+
+    def create_snippet(self, page: Dict, query_set: set, snippet_length: int = 200) -> str:
+        """Create a relevant snippet from a page's pre-tokenized sentences"""
         best_sentence = ""
         best_score = 0
         
-        for sentence in sentences:
-            sentence_words = self.preprocess_text(sentence)
-            score = len(set(query_words) & set(sentence_words))
+        for sentence, sentence_tokens in page['sentences']:
+            score = len(query_set & sentence_tokens)
             
             if score > best_score:
                 best_score = score
-                best_sentence = sentence.strip()
+                best_sentence = sentence
+                # No later sentence can beat one containing every query word
+                if score == len(query_set):
+                    break
         
         if len(best_sentence) > snippet_length:
             best_sentence = best_sentence[:snippet_length] + "..."
         
-        return best_sentence or content[:snippet_length] + "..."
+        return best_sentence or page['content'][:snippet_length] + "..."
 
     def find_faculty_by_name(self, name: str) -> Optional[Dict]:
         """Find faculty member by name"""
@@ -204,11 +433,7 @@ class UniversityKnowledgeBase:
             return self.faculty_index[name_lower]
         
         # Partial match
-        for faculty_name, faculty_info in self.faculty_index.items():
-            if name_lower in faculty_name or any(part in faculty_name for part in name_lower.split()):
-                return faculty_info
-        
-        return None
+        return self.find_partial_match(name_lower, self.faculty_index, self.faculty_token_index)
 
     def get_department_info(self, dept_name: str) -> Optional[Dict]:
         """Get department information"""
@@ -219,27 +444,42 @@ class UniversityKnowledgeBase:
             return self.department_index[dept_lower]
         
         # Partial match
-        for department_name, dept_info in self.department_index.items():
-            if dept_lower in department_name or any(part in department_name for part in dept_lower.split()):
-                return dept_info
-        
-        return None
+        return self.find_partial_match(dept_lower, self.department_index, self.department_token_index)
+
+    def fingerprint(self) -> Tuple[int, int]:
+        """Identify the current database, to tell when cached answers are stale"""
+        stat = self.db_path.stat()
+        return stat.st_size, stat.st_mtime_ns
 
     def get_recent_notifications(self, limit: int = 5) -> List[Dict]:
         """Get recent notifications"""
-        sorted_notifications = sorted(
-            self.notifications, 
-            key=lambda x: x.get('date', ''), 
-            reverse=True
-        )
-        return sorted_notifications[:limit]
+        return self.notifications[:limit]
 
 class UniversityAIChatbot:
     """Main AI chatbot class for University of Malakand"""
     
+    # Entity patterns, compiled once and tried in order
+    _NAME_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'(dr\.?\s+[a-z\s]+)',
+        r'(prof\.?\s+[a-z\s]+)',
+        r'(professor\s+[a-z\s]+)'
+    )]
+    _DEPT_RES = [re.compile(rf'{keyword}\s+([a-z\s]+)', re.IGNORECASE)
+                 for keyword in ('department of', 'dept of', 'faculty of')]
+    
+    # Common question patterns
+    _QUESTION_RES = {
+        'who_is': re.compile(r'who is (.+?)[\?]?'),
+        'what_is': re.compile(r'what is (.+?)[\?]?'),
+        'when_is': re.compile(r'when is (.+?)[\?]?'),
+        'where_is': re.compile(r'where is (.+?)[\?]?'),
+        'how_to': re.compile(r'how to (.+?)[\?]?')
+    }
+    
     def __init__(self, data_dir: str = "university_data"):
         self.kb = UniversityKnowledgeBase(data_dir)
-        self.conversation_history = []
+        # Most recent turns only, so a long-running server doesn't grow without bound
+        self.conversation_history = deque(maxlen=200)
         
         # Intent patterns
         self.intent_patterns = {
@@ -253,27 +493,139 @@ class UniversityAIChatbot:
             'general': ['about', 'history', 'information', 'what is', 'tell me']
         }
         
-        # Common question patterns
-        self.question_patterns = {
-            'who_is': r'who is (.+?)[\?]?',
-            'what_is': r'what is (.+?)[\?]?',
-            'when_is': r'when is (.+?)[\?]?',
-            'where_is': r'where is (.+?)[\?]?',
-            'how_to': r'how to (.+?)[\?]?'
+        # All intent keywords in one regex, longest first, matched in a lookahead
+        # so overlapping keywords are all found. Any shorter keyword that is a
+        # prefix of the match (e.g. 'faculty' in 'faculty of') is present too.
+        keyword_intents = [(keyword, intent) for intent, keywords in self.intent_patterns.items()
+                           for keyword in keywords]
+        keywords = sorted({keyword for keyword, _ in keyword_intents}, key=len, reverse=True)
+        self.intent_regex = re.compile('(?=(' + '|'.join(map(re.escape, keywords)) + '))')
+        self.keyword_hits = {
+            keyword: frozenset((other, intent) for other, intent in keyword_intents
+                               if keyword.startswith(other))
+            for keyword in keywords
         }
+        
+        # Common question patterns
+        self.question_patterns = self._QUESTION_RES
+        
+        # LRU cache of responses keyed on the normalized query; queries that
+        # differ only in word order, stopwords or punctuation can also reuse
+        # an entry, see find_similar_response
+        self.response_cache = OrderedDict()
+        # Signature -> key of the cached query with that signature
+        self.response_signatures = {}
+        self.response_cache_size = 512
+        self.response_cache_path = self.kb.data_dir / "query_cache.pkl"
+        self.response_cache_changed = False
+        # Guards the cache against a save at exit while a request updates it
+        self.response_cache_lock = threading.Lock()
+        # The database the cached answers came from; it may be rebuilt while we run
+        self.kb_fingerprint = self.kb.fingerprint()
+        self.load_response_cache()
+        
+        # Only the newest chatbot saves its cache at exit, and replaced ones
+        # can still be garbage collected
+        global _current_chatbot
+        _current_chatbot = weakref.ref(self)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase a query and collapse its whitespace"""
+        return " ".join(query.lower().split())
+
+    def load_response_cache(self):
+        """Load the responses saved by a previous run on the same knowledge base"""
+        try:
+            with open(self.response_cache_path, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            return
+        if isinstance(saved, dict) and saved.get('fingerprint') == self.kb_fingerprint \
+                and saved.get('version') == _CODE_VERSION \
+                and isinstance(saved.get('responses'), OrderedDict):
+            self.response_cache = saved['responses']
+            self.response_signatures = {entry['signature']: key
+                                        for key, entry in self.response_cache.items()
+                                        if entry['signature'][2]}
+
+    def save_response_cache(self):
+        """Save the response cache if it changed"""
+        if not self.response_cache_changed:
+            return
+        # Answers from a database that has since been replaced are stale
+        try:
+            if self.kb.fingerprint() != self.kb_fingerprint:
+                return
+        except OSError:
+            return
+        with self.response_cache_lock:
+            responses = OrderedDict(self.response_cache)
+        saved = {'fingerprint': self.kb_fingerprint, 'version': _CODE_VERSION,
+                 'responses': responses}
+        # Write to a temporary name first so a concurrent reader never sees half a file
+        temp_path = self.response_cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.response_cache_path)
+            self.response_cache_changed = False
+        except OSError as e:
+            self.kb.logger.warning(f"Could not save response cache: {e}")
+
+    def find_similar_response(self, signature: Tuple) -> Optional[str]:
+        """Return the cached response of a query with the same signature"""
+        key = self.response_signatures.get(signature)
+        if key is None:
+            return None
+        self.response_cache.move_to_end(key)
+        return self.response_cache[key]['response']
+
+    def respond(self, query: str) -> str:
+        """Generate a response, reusing cached responses to the same or similar queries"""
+        key = self.normalize_query(query)
+        with self.response_cache_lock:
+            entry = self.response_cache.get(key)
+            if entry is not None:
+                self.response_cache.move_to_end(key)
+                return entry['response']
+        
+        # Responses depend on the intent, the entities and how often each
+        # search word occurs, not on word order; a looser match (e.g. by
+        # cosine similarity) reused answers that a fresh query wouldn't give
+        words = self.kb.preprocess_text(key)
+        signature = (self.detect_intent(key), tuple(sorted(self.extract_entities(key).items())),
+                     tuple(sorted(words)))
+        if words:
+            with self.response_cache_lock:
+                response = self.find_similar_response(signature)
+            if response is not None:
+                return response
+        
+        response = self.generate_response(key)
+        with self.response_cache_lock:
+            self.response_cache[key] = {'response': response, 'signature': signature}
+            if words:
+                self.response_signatures[signature] = key
+            if len(self.response_cache) > self.response_cache_size:
+                evicted_key, evicted = self.response_cache.popitem(last=False)
+                if self.response_signatures.get(evicted['signature']) == evicted_key:
+                    del self.response_signatures[evicted['signature']]
+            self.response_cache_changed = True
+        return response
 
     def detect_intent(self, query: str) -> str:
         """Detect user intent from query"""
-        query_lower = query.lower()
-        
-        intent_scores = {}
-        for intent, keywords in self.intent_patterns.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
-            if score > 0:
-                intent_scores[intent] = score
+        # Distinct (keyword, intent) pairs found in the query
+        hits = set()
+        for match in self.intent_regex.finditer(query.lower()):
+            hits |= self.keyword_hits[match.group(1)]
         
-        if intent_scores:
-            return max(intent_scores, key=intent_scores.get)
+        if hits:
+            # Score each intent by its distinct keywords; ties go to the
+            # intent listed first
+            intent_scores = Counter(intent for _, intent in hits)
+            return max(self.intent_patterns, key=lambda intent: intent_scores[intent])
         
         return 'general'
 
@@ -282,23 +634,15 @@ class UniversityAIChatbot:
         entities = {}
         
         # Check for person names (Dr./Prof. patterns)
-        name_patterns = [
-            r'(dr\.?\s+[a-z\s]+)',
-            r'(prof\.?\s+[a-z\s]+)',
-            r'(professor\s+[a-z\s]+)'
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
+        for regex in self._NAME_RES:
+            match = regex.search(query)
             if match:
                 entities['person'] = match.group(1).strip()
                 break
         
         # Extract department names
-        dept_keywords = ['department of', 'dept of', 'faculty of']
-        for keyword in dept_keywords:
-            pattern = rf'{keyword}\s+([a-z\s]+)'
-            match = re.search(pattern, query, re.IGNORECASE)
+        for regex in self._DEPT_RES:
+            match = regex.search(query)
             if match:
                 entities['department'] = match.group(1).strip()
                 break
@@ -342,8 +686,7 @@ class UniversityAIChatbot:
                 return response
         
         # General faculty search
-        search_results = self.kb.semantic_search(query, limit=3)
-        faculty_results = [r for r in search_results if r.category == 'faculty']
+        faculty_results = self.kb.semantic_search(query, limit=3, categories={'faculty'})
         
         if faculty_results:
             response = "Here's what I found about faculty:\n\n"
@@ -394,8 +737,7 @@ class UniversityAIChatbot:
                 return response
         
         # General department search
-        search_results = self.kb.semantic_search(query, limit=3)
-        dept_results = [r for r in search_results if r.category == 'department']
+        dept_results = self.kb.semantic_search(query, limit=3, categories={'department'})
         
         if dept_results:
             response = "Here's information about departments:\n\n"
@@ -419,8 +761,7 @@ class UniversityAIChatbot:
                     response += f"  {notification['content'][:100]}...\n\n"
         else:
             # Search in general content
-            search_results = self.kb.semantic_search(query, limit=3)
-            notification_results = [r for r in search_results if r.category == 'notifications']
+            notification_results = self.kb.semantic_search(query, limit=3, categories={'notifications'})
             
             if notification_results:
                 response = "**University Updates:**\n\n"
@@ -461,25 +802,46 @@ class UniversityAIChatbot:
 
     def chat(self, query: str) -> str:
         """Main chat interface"""
-        # Add to conversation history
+        # Generate response
+        response = self.respond(query)
+        
+        # Add the turn to conversation history
+        timestamp = datetime.now().isoformat()
         self.conversation_history.append({
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'query': query,
             'type': 'user'
         })
-        
-        # Generate response
-        response = self.generate_response(query)
-        
-        # Add response to history
         self.conversation_history.append({
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'response': response,
             'type': 'bot'
         })
         
         return response
 
+    def chat_batch(self, queries: List[str]) -> List[str]:
+        """Answer several queries in one call, generating each distinct query once"""
+        responses = {}
+        for query in queries:
+            if query not in responses:
+                responses[query] = self.respond(query)
+
+        timestamp = datetime.now().isoformat()
+        for query in queries:
+            self.conversation_history.append({
+                'timestamp': timestamp,
+                'query': query,
+                'type': 'user'
+            })
+            self.conversation_history.append({
+                'timestamp': timestamp,
+                'response': responses[query],
+                'type': 'bot'
+            })
+
+        return [responses[query] for query in queries]
+
     def get_quick_help(self) -> str:
         """Provide quick help information"""
         return """
@@ -502,6 +864,16 @@ I can help you with:
 Just ask your question in English or Urdu, and I'll provide you with accurate information!
         """
 
+# The most recently created chatbot, whose response cache is saved at exit
+_current_chatbot = None
+
+def _save_current_response_cache():
+    chatbot = _current_chatbot() if _current_chatbot else None
+    if chatbot is not None:
+        chatbot.save_response_cache()
+
+atexit.register(_save_current_response_cache)
+
 def main():
     """Main function to run the chatbot"""
     print("🎓 University of Malakand AI Chatbot")
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for running the University of Malakand AI Chatbot
+under a production server, e.g.:
+
+    gunicorn wsgi:application
+
+gunicorn.conf.py preloads this module in the master process, so the
+chatbot is loaded once and shared with the forked workers.
+"""
+
+import gc
+
+from flask_server import app, initialize_chatbot
+
+# Load the knowledge base once per process; falls back to demo mode
+initialize_chatbot()
+
+# Move everything loaded so far out of the garbage collector's reach, so
+# collections in forked workers don't write to (and copy) shared pages
+gc.freeze()
+
+application = app